@@ -1,12 +1,25 @@
 import streamlit as st
 import aiohttp
 import asyncio
+import atexit
 from crawl4ai import AsyncWebCrawler
 import ssl
 import certifi
+import logging
 import ollama
 import time
+import math
+import threading
 from datetime import datetime
+from urllib.parse import urlparse
+from research_search import (
+    LocalSearchProvider,
+    SearchCache,
+    SerpApiSearchProvider,
+    build_section_prompt,
+    chunk_scraped_data,
+    select_passages,
+)
 
 try:
     import pyperclip
@@ -16,9 +29,34 @@ except ImportError:
 
 ssl_context = ssl.create_default_context(cafile=certifi.where())
 
+logger = logging.getLogger(__name__)
+
 # Constants
 SERPAPI_API_KEY = "your-searchapi-key"
-SERPAPI_URL = "https://serpapi.com/search.json"
+SEARCH_PROVIDER = "auto"  # "serpapi", "local", or "auto" (SerpAPI when a key is configured)
+SCRAPE_CONCURRENCY = 4  # Pages scraped in parallel
+SCRAPE_HOST_INTERVAL = 1.0  # Minimum seconds between requests to the same host
+SCRAPE_URL_TIMEOUT = 45  # Deadline in seconds for a single page
+OLLAMA_MODEL = "llama3.2:latest"
+OLLAMA_KEEP_ALIVE = "30m"  # How long Ollama keeps the model loaded between requests
+SECTION_CONCURRENCY = 3  # Paper sections generated in parallel
+STREAM_RENDER_INTERVAL = 0.15  # Minimum seconds between redraws of a streaming section
+OLLAMA_NUM_CTX = 4096  # Context window requested from Ollama for each section
+SECTION_MAX_TOKENS = 1024  # Output tokens reserved for each generated section
+PROMPT_OVERHEAD_TOKENS = 256  # Section instructions around the source excerpts
+CONTEXT_TOKEN_BUDGET = OLLAMA_NUM_CTX - SECTION_MAX_TOKENS - PROMPT_OVERHEAD_TOKENS  # Source excerpts per prompt
+PREVIEW_CHARS = 2000  # Scraped content shown per preview part in the sidebar
+# Playwright error messages that mean the shared browser is gone rather than a single page failing
+BROWSER_ERROR_MARKERS = ("has been closed", "browser has disconnected", "target closed", "connection closed")
+
+# Research paper sections: title, retrieval focus terms and the prompt used to write each one
+PAPER_SECTIONS = [
+    ("Introduction", "background overview history definition context", "Write a detailed introduction for a research paper about {query}. Include relevant background information and context."),
+    ("Methodology", "method methods data study sources approach analysis", "Describe the methodology used to gather data for a research paper about {query}. Be specific about the sources and techniques."),
+    ("Results", "results findings data statistics percent study showed", "Summarize the key findings from the scraped data about {query}. Include specific data points, quotes, and references."),
+    ("Discussion", "implications impact significance challenges risks benefits", "Discuss the implications of the findings about {query}. Analyze the significance and potential impact."),
+    ("Conclusion", "future trends outlook recommendations research", "Write a comprehensive conclusion for a research paper about {query}. Summarize the findings and suggest future research directions."),
+]
 
 # Streamlit Configuration
 st.set_page_config(page_title="AI Research Assistant", layout="wide", initial_sidebar_state="expanded")
@@ -193,9 +231,28 @@ if 'current_step' not in st.session_state:
         'scraped_data': {},
         'found_urls': [],
         'final_answer': "",
+        'section_stats': {},
+        'research_query': "",
+        'total_time': None,
         'is_generating': False
     })
 
+
+@st.fragment
+def render_scraped_previews(key):
+    # Only the selected page is rendered, one part at a time. As a fragment, its widgets rerun
+    # just the preview instead of the whole script.
+    if not st.toggle("Show scraped content", key=f"{key}_show"):
+        return
+    url = st.selectbox("Page", list(st.session_state.scraped_data), key=f"{key}_url")
+    content = st.session_state.scraped_data[url]["full_content"] or ""
+    parts = max(1, math.ceil(len(content) / PREVIEW_CHARS))
+    part = 1
+    if parts > 1:
+        part = st.number_input(f"Part (of {parts})", min_value=1, max_value=parts, value=1, key=f"{key}_part")
+    st.code(content[(part - 1) * PREVIEW_CHARS:part * PREVIEW_CHARS], language="markdown")
+
+
 # Sidebar setup
 with st.sidebar:
     st.markdown("## Research Progress")
@@ -207,9 +264,7 @@ with st.sidebar:
 
     if st.session_state.scraped_data:
         with st.expander("Scraped Content Preview", expanded=False):
-            for url, content in st.session_state.scraped_data.items():
-                st.markdown(f"**{url}**")
-                st.code(content['full_content'], language="markdown")
+            render_scraped_previews("sidebar_top")
 
     st.markdown("### Model Activity")
     status_placeholder = st.empty()
@@ -253,115 +308,330 @@ def update_status():
         ])), unsafe_allow_html=True)
 
 
-async def perform_search_async(session, query):
-    params = {"q": query, "api_key": SERPAPI_API_KEY, "engine": "google", "num": 10}
-    async with session.get(SERPAPI_URL, params=params) as resp:
-        results = await resp.json()
-        return [item.get("link") for item in results.get("organic_results", [])][:10]
-
+def is_browser_error(message):
+    message = message.lower()
+    return any(marker in message for marker in BROWSER_ERROR_MARKERS)
 
-async def scrape_websites(urls):
-    results = {}
-    async with AsyncWebCrawler(
-            extract_blocks=True,  # Extract structured blocks
-            parse_tags=["html", "body", "p", "div", "article", "main", "section", "span", "h1", "h2", "h3", "h4", "h5",
-                        "h6", "header", "footer", "ul", "ol", "li", "blockquote"],
-            include_images=False,
-            include_links=False,
-            render_js=True,
-            timeout=60,
-            headers={
-                "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36",
-                "Accept-Language": "en-US,en;q=0.9",
-            }
-    ) as crawler:
-        for idx, url in enumerate(urls):
-            try:
-                add_progress_message(f"🌐 Scraping {url}...")
-                start = time.time()
 
-                # Run the crawler
-                result = await crawler.arun(url=url)
-                elapsed = time.time() - start
+class ResourcePool:
+    """Browser, HTTP session and Ollama model kept alive across Streamlit reruns and sessions
 
-                # Extract full content
-                content = result.markdown
+    Playwright and aiohttp objects belong to the event loop that created them, while every
+    button press runs in a fresh asyncio.run() loop, so they live on a dedicated background
+    loop and callers await them through submit().
 
-                # Store the full content
-                results[url] = {
-                    "full_content": content,
-                }
-
-                add_progress_message(f"✅ Scraped {url} ({len(content)} chars, {elapsed:.1f}s)")
-                update_progress(40 + int((idx + 1) / len(urls) * 30))
+    close() releases the browser, the session and the loop thread. It runs when Streamlit
+    releases the cached pool and at interpreter exit. Streamlit may keep a superseded pool
+    without releasing it, for example after get_resource_pool itself is edited; that pool
+    lives until the process exits.
+    """
 
+    def __init__(self, preload_browser=True):
+        self.loop = asyncio.new_event_loop()
+        threading.Thread(target=self.loop.run_forever, name="research-resources", daemon=True).start()
+        self._crawler = None
+        self._session = None
+        self._crawler_lock = asyncio.Lock()
+        self._session_lock = asyncio.Lock()
+        self._closed = False
+        atexit.register(self.close)
+
+        # Load the model, and launch the browser if pages will be scraped, before the first search
+        asyncio.run_coroutine_threadsafe(self._warm_up(preload_browser), self.loop)
+
+    def submit(self, coro):
+        """Run coro on the pool's loop and return an awaitable for the caller's loop"""
+        return asyncio.wrap_future(asyncio.run_coroutine_threadsafe(coro, self.loop))
+
+    async def _warm_up(self, preload_browser):
+        warm_ups = {"Model": self._load_model()}
+        if preload_browser:
+            warm_ups["Browser"] = self.get_crawler()
+        results = await asyncio.gather(*warm_ups.values(), return_exceptions=True)
+        for name, result in zip(warm_ups, results):
+            if isinstance(result, Exception):
+                logger.warning("%s warm-up failed: %s", name, result)
+
+    def close(self):
+        """Close the browser and HTTP session and stop the background loop"""
+        if self._closed:
+            return
+        self._closed = True
+        try:
+            asyncio.run_coroutine_threadsafe(self._close_resources(), self.loop).result(timeout=10)
+        except Exception as e:
+            logger.warning("Error closing resources: %s", e)
+        self.loop.call_soon_threadsafe(self.loop.stop)
+
+    async def _close_resources(self):
+        async with self._crawler_lock:
+            crawler, self._crawler = self._crawler, None
+        async with self._session_lock:
+            session, self._session = self._session, None
+        try:
+            if crawler is not None:
+                await crawler.close()
+        finally:
+            if session is not None:
+                await session.close()
+
+    async def _load_model(self):
+        # An empty chat only loads the model into memory; num_ctx must match the section
+        # requests or Ollama reloads the model for them
+        await ollama.AsyncClient().chat(model=OLLAMA_MODEL, messages=[], options={"num_ctx": OLLAMA_NUM_CTX},
+                                        keep_alive=OLLAMA_KEEP_ALIVE)
+
+    async def get_crawler(self):
+        async with self._crawler_lock:
+            if self._crawler is None:
+                crawler = AsyncWebCrawler(
+                    extract_blocks=True,  # Extract structured blocks
+                    parse_tags=["html", "body", "p", "div", "article", "main", "section", "span", "h1", "h2", "h3", "h4",
+                                "h5", "h6", "header", "footer", "ul", "ol", "li", "blockquote"],
+                    include_images=False,
+                    include_links=False,
+                    render_js=True,
+                    timeout=60,
+                    headers={
+                        "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36",
+                        "Accept-Language": "en-US,en;q=0.9",
+                    }
+                )
+                await crawler.start()
+                self._crawler = crawler
+        return self._crawler
+
+    async def get_session(self):
+        async with self._session_lock:
+            if self._session is None or self._session.closed:
+                connector = aiohttp.TCPConnector(ssl=ssl_context, limit=20, ttl_dns_cache=300, keepalive_timeout=60)
+                self._session = aiohttp.ClientSession(connector=connector)
+        return self._session
+
+    async def crawl(self, url):
+        crawler = await self.get_crawler()
+        try:
+            result = await crawler.arun(url=url)
+        except Exception as e:
+            if is_browser_error(str(e)):
+                await self._reset_crawler(crawler)
+            raise
+        if not result.success and is_browser_error(result.error_message or ""):
+            await self._reset_crawler(crawler)
+        return result
+
+    async def _reset_crawler(self, crawler):
+        # Drop a crashed or disconnected browser so the next crawl launches a new one
+        async with self._crawler_lock:
+            if self._crawler is not crawler:
+                return
+            self._crawler = None
+        try:
+            await crawler.close()
+        except Exception as e:
+            logger.warning("Error closing crawler: %s", e)
+
+    async def search(self, provider, query):
+        return await provider.search(await self.get_session(), query)
+
+
+@st.cache_resource(show_spinner=False, on_release=lambda pool: pool.close())
+def get_resource_pool():
+    # The local provider returns page content itself, so the browser is only started on demand
+    return ResourcePool(preload_browser=get_search_provider().name != "local")
+
+
+@st.cache_resource
+def get_search_cache():
+    return SearchCache()
+
+
+def get_search_provider():
+    provider = SEARCH_PROVIDER
+    if provider == "auto":
+        provider = "serpapi" if SERPAPI_API_KEY and SERPAPI_API_KEY != "your-searchapi-key" else "local"
+    if provider == "serpapi":
+        return SerpApiSearchProvider(SERPAPI_API_KEY)
+    if provider == "local":
+        return LocalSearchProvider()
+    raise ValueError(f"Unknown search provider: {SEARCH_PROVIDER}")
+
+
+async def perform_search_async(pool, query):
+    provider = get_search_provider()
+    if not provider.cacheable:
+        return await pool.submit(pool.search(provider, query))
+    key = (provider.name, " ".join(query.lower().split()))
+    return await get_search_cache().get_or_fetch(key, lambda: pool.submit(pool.search(provider, query)))
+
+
+async def scrape_websites(pool, urls):
+    results = {}
+    semaphore = asyncio.Semaphore(SCRAPE_CONCURRENCY)
+    host_locks = {}
+    host_last_request = {}
+
+    async def scrape_one(url):
+        host = urlparse(url).netloc
+        # Space out requests to the same host instead of sleeping after every page. The host
+        # interval is waited out before taking a worker slot, so slots never sit idle while
+        # pages on other hosts are queued.
+        async with host_locks.setdefault(host, asyncio.Lock()):
+            wait = host_last_request.get(host, 0) + SCRAPE_HOST_INTERVAL - time.monotonic()
+            if wait > 0:
+                await asyncio.sleep(wait)
+            await semaphore.acquire()
+            host_last_request[host] = time.monotonic()
+
+        try:
+            add_progress_message(f"🌐 Scraping {url}...")
+            start = time.time()
+            try:
+                # Run the crawler on the shared browser
+                result = await asyncio.wait_for(pool.submit(pool.crawl(url)), timeout=SCRAPE_URL_TIMEOUT)
+            except asyncio.TimeoutError:
+                return url, None, f"timed out after {SCRAPE_URL_TIMEOUT}s", time.time() - start
             except Exception as e:
-                results[url] = {
-                    "full_content": f"❌ Failed to scrape: {str(e)}",
-                }
-                add_progress_message(f"❌ Failed {url}: {str(e)}")
+                return url, None, str(e), time.time() - start
+
+            # crawl4ai reports most failures on the result rather than raising
+            if not result.success or not result.markdown:
+                return url, None, result.error_message or "no content returned", time.time() - start
+            return url, result.markdown, None, time.time() - start
+        finally:
+            semaphore.release()
+
+    tasks = [asyncio.create_task(scrape_one(url)) for url in urls]
+    for done, task in enumerate(asyncio.as_completed(tasks), start=1):
+        url, content, error, elapsed = await task
+
+        if error is None:
+            # Store the full content
+            results[url] = {
+                "full_content": content,
+            }
+            add_progress_message(f"✅ Scraped {url} ({len(content)} chars, {elapsed:.1f}s)")
+        else:
+            results[url] = {
+                "full_content": f"❌ Failed to scrape: {error}",
+            }
+            add_progress_message(f"❌ Failed {url}: {error}")
 
-            await asyncio.sleep(1)  # Delay to avoid rate limits
-    return results
+        update_progress(40 + int(done / len(urls) * 30))
 
-
-def generate_answer(prompt):
-    response = ollama.chat(
-        model="llama3.2:latest",
-        messages=[{"role": "user", "content": prompt}],
-        options={"temperature": 0.7}
-    )
-    return response["message"]["content"]
+    # Keep the search ranking order for references and previews
+    return {url: results[url] for url in urls}
 
 
-def generate_research_paper(scraped_data):
+def render_section(placeholder, title, content, stats=None):
+    footer = ""
+    if stats:
+        footer = (f"\n\n*⏱️ {stats['elapsed']:.1f}s · {stats['prompt_tokens']} prompt tokens · "
+                  f"{stats['output_tokens']} output tokens ({stats['tokens_per_sec']:.1f} tok/s)*")
+    placeholder.markdown(f"#### {title}\n\n{content}{footer}")
 
-    introduction = generate_answer(f"Write a detailed introduction for a research paper about {query}. Include relevant background information and context.")
-    methodology = generate_answer(f"Describe the methodology used to gather data for a research paper about {query}. Be specific about the sources and techniques.")
-    results = generate_answer(f"Summarize the key findings from the scraped data about {query}. Include specific data points, quotes, and references.")
-    discussion = generate_answer(f"Discuss the implications of the findings about {query}. Analyze the significance and potential impact.")
-    conclusion = generate_answer(f"Write a comprehensive conclusion for a research paper about {query}. Summarize the findings and suggest future research directions.")
 
+async def generate_answer(client, prompt, title, placeholder):
+    start = time.time()
+    content = ""
+    final_chunk = None
+    last_render = 0.0
+    stream = await client.chat(
+        model=OLLAMA_MODEL,
+        messages=[{"role": "user", "content": prompt}],
+        options={"temperature": 0.7, "num_ctx": OLLAMA_NUM_CTX, "num_predict": SECTION_MAX_TOKENS},
+        keep_alive=OLLAMA_KEEP_ALIVE,
+        stream=True
+    )
+    async for chunk in stream:
+        content += chunk["message"]["content"]
+        # Each redraw resends the whole section, so only refresh a few times per second
+        if time.monotonic() - last_render >= STREAM_RENDER_INTERVAL:
+            render_section(placeholder, title, content + " ▌")
+            last_render = time.monotonic()
+        if chunk.get("done"):
+            final_chunk = chunk
+
+    # The last streamed chunk carries Ollama's token counts and timings
+    elapsed = time.time() - start
+    final_chunk = final_chunk or {}
+    output_tokens = final_chunk.get("eval_count") or 0
+    eval_seconds = (final_chunk.get("eval_duration") or 0) / 1e9
+    stats = {
+        "elapsed": elapsed,
+        "prompt_tokens": final_chunk.get("prompt_eval_count") or 0,
+        "output_tokens": output_tokens,
+        "tokens_per_sec": output_tokens / (eval_seconds or elapsed or 1),
+    }
+    render_section(placeholder, title, content, stats)
+    return content, stats
+
+
+async def generate_research_paper(scraped_data, report_placeholder):
+    client = ollama.AsyncClient()
+    semaphore = asyncio.Semaphore(SECTION_CONCURRENCY)
+
+    # Drafts stream into the report placeholder and are replaced by the finished report
+    with report_placeholder.container():
+        st.markdown("### Drafting Sections")
+        placeholders = {title: st.empty() for title, _, _ in PAPER_SECTIONS}
+    for title, placeholder in placeholders.items():
+        placeholder.markdown(f"#### {title}\n\n*Waiting...*")
+
+    chunks = chunk_scraped_data(scraped_data)
+    add_progress_message(f"📚 Indexed {len(chunks)} passages from {len(scraped_data)} pages")
+
+    async def generate_section(title, focus, prompt):
+        passages = select_passages(chunks, f"{query} {focus}", CONTEXT_TOKEN_BUDGET)
+        section_prompt = build_section_prompt(prompt.format(query=query), passages)
+        async with semaphore:
+            add_progress_message(f"✍️ Writing {title.lower()} ({len(passages)} passages)...")
+            content, stats = await generate_answer(client, section_prompt, title, placeholders[title])
+            add_progress_message(f"✅ {title} done ({stats['output_tokens']} tokens, {stats['elapsed']:.1f}s)")
+            st.session_state.section_stats[title] = stats
+            return content
+
+    contents = await asyncio.gather(*[generate_section(*section) for section in PAPER_SECTIONS])
+    sections = dict(zip([title for title, _, _ in PAPER_SECTIONS], contents))
+
+    # Numbered to match the [n] citations in the section prompts
+    references = "\n".join([f"{idx}. [{url}]({url})" for idx, url in enumerate(scraped_data.keys(), start=1)])
     appendix = f"""
         ## Appendix
 
         ### References
-        {"\n".join([f"- [{url}]({url})" for url in scraped_data.keys()])}
+        {references}
 
         ### Author
         - **Generated by**: AI Research Assistant
         - **Date**: {datetime.now().strftime("%Y-%m-%d %H:%M:%S")}
     """
 
+    body = "\n".join([f"\n        ## {title}\n        {content}\n" for title, content in sections.items()])
+
     research_paper = f"""
         # Research Paper: {query}
-
-        ## Introduction
-        {introduction}
-
-        ## Methodology
-        {methodology}
-
-        ## Results
-        {results}
-
-        ## Discussion
-        {discussion}
-
-        ## Conclusion
-        {conclusion}
-
+{body}
         {appendix}
     """
     return research_paper
 
 
 def simulate_typing_effect(text, placeholder):
+    # Sections finish in any order, so list their timings in paper order
+    section_stats = st.session_state.section_stats
+    section_timings = " · ".join([
+        f"{title}: {section_stats[title]['elapsed']:.1f}s, {section_stats[title]['output_tokens']} tokens"
+        for title, _, _ in PAPER_SECTIONS if title in section_stats
+    ])
     placeholder.markdown(f"""
         <div class='ai-response'>
-            <h3 style='color: #4F46E5; margin-bottom: 1rem;'>Research Report: {query}</h3>
+            <h3 style='color: #4F46E5; margin-bottom: 1rem;'>Research Report: {st.session_state.research_query}</h3>
+            <div style='color: #94A3B8; margin-bottom: 1rem;'>
+                ⏱️ Generated in {st.session_state.total_time:.1f} seconds from {len(st.session_state.found_urls)} sources
+            </div>
             <div style='color: #94A3B8; margin-bottom: 1rem;'>
-                ⏱️ Generated in {time.time() - st.session_state.start_time:.1f} seconds from {len(st.session_state.found_urls)} sources
+                {section_timings}
             </div>
             <div class='typing-effect'>{text}</div>
         </div>
@@ -377,6 +647,9 @@ def copy_to_clipboard(text):
         st.toast("Copy the text manually from the code block above.", icon="ℹ️")
 
 
+# Start the browser and load the model before the first search
+resource_pool = get_resource_pool()
+
 if st.button("Start Research"):
     if query.strip():
         st.session_state.update({
@@ -386,52 +659,65 @@ if st.button("Start Research"):
             'scraped_data': {},
             'found_urls': [],
             'final_answer': "",
+            'section_stats': {},
+            'research_query': query,
+            'total_time': None,
             'is_generating': False
         })
 
         async def main():
-            async with aiohttp.ClientSession(connector=aiohttp.TCPConnector(ssl=ssl_context)) as session:
-                # Phase 1: Search
-                st.session_state.current_step = 1
-                add_progress_message("🔍 Starting web search...")
-                update_progress(10)
-
-                urls = await perform_search_async(session, query)
-                st.session_state.found_urls = urls
-
-                if not urls:
-                    add_progress_message("⚠️ No results found")
-                    return
-
-                add_progress_message(f"✅ Found {len(urls)} URLs")
-                update_progress(30)
-
-                # Phase 2: Scraping
-                st.session_state.current_step = 2
-                scraped_data = await scrape_websites(urls)
-                st.session_state.scraped_data = scraped_data
-                update_progress(70)
-
-                st.session_state.current_step = 3
-                add_progress_message("🧠 Starting content analysis...")
-
-                # Generate research paper
-                research_paper = generate_research_paper(scraped_data)
-                st.session_state.final_answer = research_paper
-                add_progress_message("✅ Research paper generated")
-                update_progress(95)
-
-                st.session_state.current_step = 5
-                total_time = time.time() - st.session_state.start_time
-                add_progress_message(f"⏱️ Total processing time: {total_time:.1f} seconds")
-                update_progress(100)
-
-                placeholder = st.empty()
-                simulate_typing_effect(research_paper, placeholder)
+            # Phase 1: Search
+            st.session_state.current_step = 1
+            add_progress_message("🔍 Starting web search...")
+            update_progress(10)
+
+            search_results = await perform_search_async(resource_pool, query)
+            urls = [result["url"] for result in search_results]
+            st.session_state.found_urls = urls
+
+            if not urls:
+                add_progress_message("⚠️ No results found")
+                return
+
+            add_progress_message(f"✅ Found {len(urls)} URLs")
+            update_progress(30)
+
+            # Phase 2: Scraping
+            st.session_state.current_step = 2
+            # Local corpus hits already carry their content, so only scrape the rest
+            scraped_data = {result["url"]: {"full_content": result["content"]}
+                            for result in search_results if result["content"] is not None}
+            to_scrape = [url for url in urls if url not in scraped_data]
+            if to_scrape:
+                scraped_data.update(await scrape_websites(resource_pool, to_scrape))
+            scraped_data = {url: scraped_data[url] for url in urls}
+            st.session_state.scraped_data = scraped_data
+            update_progress(70)
+
+            st.session_state.current_step = 3
+            add_progress_message("🧠 Starting content analysis...")
+
+            # Generate research paper
+            report_placeholder = st.empty()
+            research_paper = await generate_research_paper(scraped_data, report_placeholder)
+            st.session_state.final_answer = research_paper
+            add_progress_message("✅ Research paper generated")
+            update_progress(95)
+
+            st.session_state.current_step = 5
+            total_time = time.time() - st.session_state.start_time
+            st.session_state.total_time = total_time
+            add_progress_message(f"⏱️ Total processing time: {total_time:.1f} seconds")
+            update_progress(100)
+
+            simulate_typing_effect(research_paper, report_placeholder)
 
         asyncio.run(main())
     else:
         st.warning("Please enter a research topic")
+elif st.session_state.final_answer:
+    # Keep the last report on screen when other widgets rerun the script
+    simulate_typing_effect(st.session_state.final_answer, st.empty())
 
 if 'current_step' not in st.session_state:
     st.session_state.update({
@@ -441,6 +727,9 @@ if 'current_step' not in st.session_state:
         'scraped_data': {},
         'found_urls': [],
         'final_answer': "",
+        'section_stats': {},
+        'research_query': "",
+        'total_time': None,
         'is_generating': False
     })
 
@@ -454,9 +743,7 @@ with st.sidebar:
 
     if st.session_state.scraped_data:
         with st.expander("Scraped Content Preview", expanded=False):
-            for url, content in st.session_state.scraped_data.items():
-                st.markdown(f"**{url}**")
-                st.code(content['full_content'], language="markdown")
+            render_scraped_previews("sidebar_bottom")
 
     st.markdown("### Model Activity")
     status_placeholder = st.empty()
@@ -0,0 +1,266 @@
+import asyncio
+import concurrent.futures
+import logging
+import math
+import re
+import threading
+import time
+from collections import Counter
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+# Constants
+SERPAPI_URL = "https://serpapi.com/search.json"
+SEARCH_CACHE_TTL = 3600  # Seconds a search result stays cached
+SEARCH_CACHE_MAX_ENTRIES = 128  # Queries kept in the shared search cache
+SEARCH_NUM_RESULTS = 10
+LOCAL_CORPUS_DIRS = ["local_knowledge", "results"]  # deep-research.py knowledge files and crawler output
+CHUNK_CHARS = 800  # Target size of a scraped-content passage
+MAX_CHUNKS_PER_SOURCE = 3  # Keep a single page from filling the whole budget
+
+STOPWORDS = {
+    "a", "an", "and", "are", "as", "at", "be", "by", "for", "from", "has", "have", "in", "is", "it", "its",
+    "of", "on", "or", "that", "the", "this", "to", "was", "were", "will", "with", "about", "can", "not",
+}
+
+
+# ================
+# Search Providers
+# ================
+
+class SerpApiSearchProvider:
+    """Google results through SerpAPI; pages still have to be scraped"""
+    name = "serpapi"
+    cacheable = True  # Each call costs latency and API quota
+
+    def __init__(self, api_key):
+        self.api_key = api_key
+
+    async def search(self, session, query, num=SEARCH_NUM_RESULTS):
+        params = {"q": query, "api_key": self.api_key, "engine": "google", "num": num}
+        async with session.get(SERPAPI_URL, params=params) as resp:
+            results = await resp.json()
+            links = [item.get("link") for item in results.get("organic_results", [])][:num]
+            return [{"url": link, "content": None} for link in links if link]
+
+
+class LocalSearchProvider:
+    """Offline search over the local knowledge files and saved crawler results"""
+    name = "local"
+    cacheable = False  # A cheap disk scan, and caching would hide newly added files
+
+    def __init__(self, corpus_dirs=LOCAL_CORPUS_DIRS):
+        self.corpus_dirs = [Path(corpus_dir) for corpus_dir in corpus_dirs]
+
+    async def search(self, session, query, num=SEARCH_NUM_RESULTS):
+        return await asyncio.to_thread(self._search, query, num)
+
+    @staticmethod
+    def _read_document(file_path):
+        # deep-research-crawler.py writes "URL: <url>" at the top of result_N.txt and the
+        # page markdown to result_N.md alongside it
+        content = file_path.read_text(encoding="utf-8")
+        first_line, _, rest = content.partition("\n")
+        if first_line.startswith("URL: "):
+            return first_line[5:].strip(), rest
+        sibling = file_path.with_suffix(".txt")
+        if file_path.suffix == ".md" and sibling.exists():
+            first_line = sibling.read_text(encoding="utf-8").partition("\n")[0]
+            if first_line.startswith("URL: "):
+                return first_line[5:].strip(), content
+        return file_path.resolve().as_uri(), content
+
+    def _search(self, query, num):
+        documents = {}
+        for corpus_dir in self.corpus_dirs:
+            if not corpus_dir.is_dir():
+                continue
+            # Markdown first so crawler pages are indexed by their markdown rather than raw text
+            for file_path in sorted(corpus_dir.glob("*.md")) + sorted(corpus_dir.glob("*.txt")):
+                try:
+                    url, content = self._read_document(file_path)
+                except Exception as e:
+                    logger.warning("Error reading %s: %s", file_path, e)
+                    continue
+                if url not in documents:
+                    documents[url] = (content, Counter(tokenize(content)))
+
+        scores = bm25_scores(tokenize(query), [terms for _, terms in documents.values()])
+        ranked = sorted(zip(scores, documents.items()), key=lambda item: -item[0])
+        return [{"url": url, "content": content} for score, (url, (content, _)) in ranked[:num] if score > 0]
+
+
+class SearchCache:
+    """TTL cache for search results that also coalesces identical in-flight queries"""
+
+    def __init__(self, ttl=SEARCH_CACHE_TTL, max_entries=SEARCH_CACHE_MAX_ENTRIES):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries = {}
+        self._inflight = {}
+        # Shared across Streamlit sessions, which run their own event loops on separate threads
+        self._lock = threading.Lock()
+
+    def _store(self, key, results):
+        # Called with the lock held. Entries are kept in insertion order, which is also expiry
+        # order, so expired and over-capacity entries are always at the front.
+        now = time.monotonic()
+        self._entries.pop(key, None)
+        self._entries[key] = (now, results)
+        for old_key, (stored_at, _) in list(self._entries.items()):
+            if now - stored_at < self.ttl and len(self._entries) <= self.max_entries:
+                break
+            del self._entries[old_key]
+
+    async def get_or_fetch(self, key, fetch):
+        while True:
+            with self._lock:
+                entry = self._entries.get(key)
+                if entry and time.monotonic() - entry[0] < self.ttl:
+                    return entry[1]
+                future = self._inflight.get(key)
+                is_leader = future is None
+                if is_leader:
+                    future = concurrent.futures.Future()
+                    self._inflight[key] = future
+
+            if is_leader:
+                break
+            try:
+                # Shielded so a cancelled follower does not cancel the result for everyone else
+                return await asyncio.shield(asyncio.wrap_future(future))
+            except asyncio.CancelledError:
+                # The leader was cancelled rather than this caller: retry, possibly as the new leader
+                if future.cancelled() and not asyncio.current_task().cancelling():
+                    continue
+                raise
+
+        try:
+            results = await fetch()
+        except asyncio.CancelledError:
+            with self._lock:
+                del self._inflight[key]
+            future.cancel()
+            raise
+        except Exception as e:
+            with self._lock:
+                del self._inflight[key]
+            future.set_exception(e)
+            raise
+
+        with self._lock:
+            # Empty results are usually an API error or quota problem, so retry them next time
+            if results:
+                self._store(key, results)
+            del self._inflight[key]
+        future.set_result(results)
+        return results
+
+
+# ==========================
+# Passage Chunking & Ranking
+# ==========================
+
+def estimate_tokens(text):
+    # English prose averages about four characters per token, URLs and numbers fewer, so
+    # estimate high to keep prompts inside the model's context window
+    return len(text) // 3 + 1
+
+
+def tokenize(text):
+    return [word for word in re.findall(r"[a-z0-9]+", text.lower()) if word not in STOPWORDS]
+
+
+def strip_boilerplate(markdown):
+    # Drop images, unwrap links and remove navigation-like lines before chunking
+    text = re.sub(r"!\[[^\]]*\]\([^)]*\)", "", markdown)
+    text = re.sub(r"\[([^\]]*)\]\([^)]*\)", r"\1", text)
+    lines = []
+    for line in text.splitlines():
+        stripped = line.strip(" \t#*->|")
+        if not stripped:
+            lines.append("")
+        elif len(stripped.split()) >= 4 or stripped.endswith((".", ":", "?", "!")):
+            lines.append(line.strip())
+    return re.sub(r"\n{3,}", "\n\n", "\n".join(lines)).strip()
+
+
+def chunk_scraped_data(scraped_data):
+    """Split scraped pages into passages tagged with the page's reference number"""
+    chunks = []
+    for source_id, (url, content) in enumerate(scraped_data.items(), start=1):
+        text = content["full_content"] or ""
+        if text.startswith("❌ Failed to scrape"):
+            continue
+
+        current = ""
+        for paragraph in strip_boilerplate(text).split("\n\n"):
+            while len(paragraph) > CHUNK_CHARS:
+                cut = paragraph.rfind(" ", 0, CHUNK_CHARS) + 1 or CHUNK_CHARS
+                chunks.append((source_id, url, paragraph[:cut].strip()))
+                paragraph = paragraph[cut:]
+            if current and len(current) + len(paragraph) > CHUNK_CHARS:
+                chunks.append((source_id, url, current))
+                current = ""
+            current = f"{current}\n\n{paragraph}" if current else paragraph
+        if current:
+            chunks.append((source_id, url, current))
+
+    return [
+        {"source_id": source_id, "url": url, "text": text, "terms": Counter(tokenize(text))}
+        for source_id, url, text in chunks
+    ]
+
+
+def bm25_scores(query_terms, documents, k1=1.2, b=0.75):
+    """Score each document's term Counter against query_terms with BM25"""
+    query_terms = set(query_terms)
+    if not documents or not query_terms:
+        return [0.0] * len(documents)
+
+    lengths = [sum(terms.values()) for terms in documents]
+    avg_length = sum(lengths) / len(documents) or 1
+    doc_freq = Counter(term for terms in documents for term in query_terms & terms.keys())
+
+    scores = []
+    for terms, length in zip(documents, lengths):
+        total = 0.0
+        for term in query_terms:
+            tf = terms.get(term, 0)
+            if tf:
+                idf = math.log(1 + (len(documents) - doc_freq[term] + 0.5) / (doc_freq[term] + 0.5))
+                total += idf * tf * (k1 + 1) / (tf + k1 * (1 - b + b * length / avg_length))
+        scores.append(total)
+    return scores
+
+
+def select_passages(chunks, search_text, token_budget):
+    """Rank passages with BM25 against search_text and keep the best ones within token_budget"""
+    scores = bm25_scores(tokenize(search_text), [chunk["terms"] for chunk in chunks])
+
+    selected = []
+    used_tokens = 0
+    per_source = Counter()
+    for chunk_score, chunk in sorted(zip(scores, chunks), key=lambda item: -item[0]):
+        if chunk_score <= 0:
+            break
+        cost = estimate_tokens(format_passage(chunk))
+        if per_source[chunk["source_id"]] >= MAX_CHUNKS_PER_SOURCE or used_tokens + cost > token_budget:
+            continue
+        selected.append(chunk)
+        used_tokens += cost
+        per_source[chunk["source_id"]] += 1
+    return selected
+
+
+def format_passage(chunk):
+    return f"[{chunk['source_id']}] {chunk['url']}\n{chunk['text']}"
+
+
+def build_section_prompt(prompt, passages):
+    if not passages:
+        return prompt
+    excerpts = "\n\n".join([format_passage(chunk) for chunk in passages])
+    return (f"{prompt}\n\nBase your answer on the source excerpts below and cite them inline by "
+            f"their reference number, e.g. [1].\n\n{excerpts}")
@@ -0,0 +1,170 @@
+import asyncio
+
+import pytest
+
+from research_search import LocalSearchProvider, SearchCache
+
+
+def make_fetch(results, delay=0.05):
+    calls = []
+
+    async def fetch():
+        calls.append(1)
+        await asyncio.sleep(delay)
+        return results
+
+    return fetch, calls
+
+
+def test_identical_inflight_queries_share_one_fetch():
+    cache = SearchCache()
+    fetch, calls = make_fetch(["https://example.org"])
+
+    async def run():
+        return await asyncio.gather(*[cache.get_or_fetch("q", fetch) for _ in range(5)])
+
+    assert asyncio.run(run()) == [["https://example.org"]] * 5
+    assert len(calls) == 1
+
+
+def test_cancelled_leader_is_retried_by_waiter():
+    cache = SearchCache()
+    fetch, calls = make_fetch(["r"], delay=0.2)
+
+    async def run():
+        leader = asyncio.create_task(cache.get_or_fetch("q", fetch))
+        await asyncio.sleep(0.01)
+        follower = asyncio.create_task(cache.get_or_fetch("q", fetch))
+        await asyncio.sleep(0.01)
+        leader.cancel()
+        result = await follower
+        return leader, result
+
+    leader, result = asyncio.run(run())
+    assert leader.cancelled()
+    assert result == ["r"]
+    assert len(calls) == 2
+
+
+def test_cancelled_waiter_does_not_cancel_leader():
+    cache = SearchCache()
+    fetch, calls = make_fetch(["r"], delay=0.2)
+
+    async def run():
+        leader = asyncio.create_task(cache.get_or_fetch("q", fetch))
+        await asyncio.sleep(0.01)
+        follower = asyncio.create_task(cache.get_or_fetch("q", fetch))
+        await asyncio.sleep(0.01)
+        follower.cancel()
+        return await leader, follower
+
+    result, follower = asyncio.run(run())
+    assert result == ["r"]
+    assert follower.cancelled()
+    assert len(calls) == 1
+
+
+def test_fetch_error_reaches_every_waiter():
+    cache = SearchCache()
+
+    async def fetch():
+        await asyncio.sleep(0.05)
+        raise RuntimeError("quota exceeded")
+
+    async def run():
+        return await asyncio.gather(*[cache.get_or_fetch("q", fetch) for _ in range(3)], return_exceptions=True)
+
+    errors = asyncio.run(run())
+    assert all(isinstance(error, RuntimeError) and str(error) == "quota exceeded" for error in errors)
+
+
+def test_entries_expire_after_ttl():
+    cache = SearchCache(ttl=0.05)
+    fetch, calls = make_fetch(["r"], delay=0)
+
+    async def run():
+        await cache.get_or_fetch("q", fetch)
+        await cache.get_or_fetch("q", fetch)
+        await asyncio.sleep(0.06)
+        await cache.get_or_fetch("q", fetch)
+
+    asyncio.run(run())
+    assert len(calls) == 2
+
+
+def test_cache_keeps_at_most_max_entries():
+    cache = SearchCache(max_entries=2)
+    fetch, calls = make_fetch(["r"], delay=0)
+
+    async def run():
+        for key in ["a", "b", "c"]:
+            await cache.get_or_fetch(key, fetch)
+        await cache.get_or_fetch("c", fetch)
+        await cache.get_or_fetch("a", fetch)
+
+    asyncio.run(run())
+    # "a" was evicted when "c" was stored, so only it is fetched again
+    assert len(calls) == 4
+
+
+def test_empty_results_are_not_cached():
+    cache = SearchCache()
+    fetch, calls = make_fetch([], delay=0)
+
+    async def run():
+        await cache.get_or_fetch("q", fetch)
+        await cache.get_or_fetch("q", fetch)
+
+    asyncio.run(run())
+    assert len(calls) == 2
+
+
+@pytest.fixture
+def corpus(tmp_path):
+    knowledge = tmp_path / "local_knowledge"
+    results = tmp_path / "results"
+    knowledge.mkdir()
+    results.mkdir()
+    (knowledge / "robots.txt").write_text("Notes on healthcare robots and AI triage.", encoding="utf-8")
+    (knowledge / "pasta.txt").write_text("How to cook pasta al dente.", encoding="utf-8")
+    (results / "result_1.txt").write_text("URL: https://example.org/ai-health\nraw page text", encoding="utf-8")
+    (results / "result_1.md").write_text("# AI in healthcare\nAI in healthcare is growing.", encoding="utf-8")
+    return [knowledge, results]
+
+
+def test_local_search_finds_matching_documents(corpus):
+    results = asyncio.run(LocalSearchProvider(corpus).search(None, "AI healthcare"))
+
+    urls = [result["url"] for result in results]
+    assert "https://example.org/ai-health" in urls
+    assert corpus[0].joinpath("robots.txt").resolve().as_uri() in urls
+    assert not any(url.endswith("pasta.txt") for url in urls)
+
+
+def test_local_search_maps_crawler_markdown_to_its_url(corpus):
+    results = asyncio.run(LocalSearchProvider(corpus).search(None, "AI healthcare"))
+
+    crawled = [result for result in results if result["url"] == "https://example.org/ai-health"]
+    # The markdown is indexed once, under the URL from result_1.txt, and the raw text is skipped
+    assert len(crawled) == 1
+    assert crawled[0]["content"] == "# AI in healthcare\nAI in healthcare is growing."
+
+
+def test_local_search_ignores_missing_directories(tmp_path):
+    assert asyncio.run(LocalSearchProvider([tmp_path / "missing"]).search(None, "anything")) == []
+
+
+def test_local_search_prefers_focused_documents_over_long_repetitive_pages(tmp_path):
+    (tmp_path / "long.txt").write_text(
+        "The future of computing looks bright. " * 200 + "Quantum machines are mentioned once.", encoding="utf-8"
+    )
+    (tmp_path / "focused.txt").write_text(
+        "Quantum error correction protects fragile qubits by encoding logical qubits across many physical "
+        "ones, and error correction thresholds decide whether quantum computers can scale.",
+        encoding="utf-8",
+    )
+    (tmp_path / "other.txt").write_text("A guide to gardening in the future.", encoding="utf-8")
+
+    results = asyncio.run(LocalSearchProvider([tmp_path]).search(None, "the future of quantum error correction"))
+
+    assert results[0]["url"].endswith("focused.txt")